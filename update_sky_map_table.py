@@ -4,9 +4,16 @@
 import os
 import re
 import argparse
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 
+# .strings 键值对: "key" = "value";
+_STRINGS_RE = re.compile(r'"([^"]+)"\s*=\s*"([^"]*)"\s*;')
+# Markdown表格的表头行（以 | 开头且包含“标识符”）
+_HEADER_RE = re.compile(r'^\|[^\n]*标识符', re.M)
+
 def parse_level_list(file_path: Path) -> List[str]:
     """
     解析地图枚举文件，提取所有地图标识符
@@ -16,15 +23,8 @@ def parse_level_list(file_path: Path) -> List[str]:
             content = f.read()
         
         # 匹配类似 "Day Sk8 Dawn Dusk Maze PHub" 这样的标识符列表
-        # 移除换行符和多余空格，然后分割
-        content = content.replace('\n', ' ').replace('\r', ' ')
-        content = re.sub(r'\s+', ' ', content).strip()
-        
-        if not content:
-            return []
-        
-        # 过滤空字符串
-        return [id for id in content.split(' ') if id]
+        # 按任意空白（含换行符）分割，自动忽略空字符串
+        return content.split()
     except Exception as e:
         print(f"解析地图枚举文件失败: {e}")
         return []
@@ -40,77 +40,59 @@ def parse_strings_file(file_path: Path) -> Dict[str, str]:
         with open(file_path, 'r', encoding='utf-8') as f:
             content = f.read()
         
-        # 使用正则表达式匹配所有键值对
-        pattern = re.compile(r'"([^"]+)"\s*=\s*"([^"]*)"\s*;')
-        matches = pattern.findall(content)
-        
-        for key, value in matches:
-            translations[key] = value
+        # 使用正则表达式逐个匹配键值对，直接写入字典
+        translations = {m.group(1): m.group(2) for m in _STRINGS_RE.finditer(content)}
     
     except Exception as e:
         print(f"解析翻译文件失败 {file_path}: {e}")
     
     return translations
 
-def get_translation_key(identifier: str, translations: Dict[str, str]) -> Tuple[str, str]:
-    """
-    根据标识符生成翻译键并查找翻译
-    优先使用 name_标识符，如果没有找到则使用 title_标识符_01
-    返回: (翻译键, 实际使用的翻译键)
-    """
-    # 尝试 name_标识符
-    name_key = f"name_{identifier.lower()}"
-    
-    # 如果 name_标识符 在翻译文件中存在，直接使用
-    if name_key in translations:
-        return name_key, name_key
-    
-    # 否则尝试 title_标识符_01
-    title_key = f"title_{identifier.lower()}_01"
-    if title_key in translations:
-        return title_key, title_key
-    
-    # 两个都没有找到
-    return "", ""
-
-def read_existing_table(table_path: Path) -> Tuple[List[str], Dict[str, Dict[str, str]], List[str]]:
+def read_existing_table(table_path: Path) -> Tuple[List[str], Dict[str, Dict[str, str]], List[str], Optional[bytes]]:
     """
     读取现有的Markdown表格，提取表头、现有数据和非表格内容
-    返回表头行、地图数据字典和非表格内容
+    返回表头行、地图数据字典、非表格内容和原文件内容的哈希值
     """
     headers = []
     existing_data = {}
     non_table_content = []
+    content_digest = None
     
     try:
-        with open(table_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        with open(table_path, 'rb') as f:
+            raw = f.read()
         
-        # 分割成行
-        lines = content.split('\n')
+        # 记录原文件的哈希值，写入时用于判断内容是否有变化
+        content_digest = hashlib.blake2b(raw).digest()
+        # 与文本模式读取一致：统一换行符为 \n
+        content = raw.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
         
-        # 查找表格开始位置
-        table_start = -1
-        for i, line in enumerate(lines):
-            if line.startswith('|') and '标识符' in line:
-                table_start = i
-                break
+        # 直接在原文中查找表格开始位置，无需逐行扫描表格之前的内容
+        match = _HEADER_RE.search(content)
         
-        if table_start == -1:
+        if not match:
             print("未找到表格，将创建新表格")
             headers = ['标识符', '中文名', '玩家社区称呼', '英文名', '翻译键', '存在版本', '隶属于', '截图', '注释']
-            non_table_content = lines
-            return headers, existing_data, non_table_content
+            non_table_content = content.split('\n')
+            return headers, existing_data, non_table_content, content_digest
         
-        # 保存表格之前的内容
-        non_table_content = lines[:table_start]
+        # 保存表格之前的内容（表头行之前的换行符不产生多余的空行）
+        table_start = match.start()
+        non_table_content = content[:table_start].split('\n')[:-1] if table_start else []
+        
+        # 表格及之后的内容分割成行
+        lines = content[table_start:].split('\n')
         
         # 提取表头
-        header_line = lines[table_start].strip()
+        header_line = lines[0].strip()
         headers = [cell.strip() for cell in header_line.strip('|').split('|')]
         
+        header_count = len(headers)
+        # 预先构建的空单元格，用于补齐列数不足的行
+        padding = [''] * header_count
+        
         # 从分隔行之后开始读取数据
-        for i in range(table_start + 2, len(lines)):
+        for i in range(2, len(lines)):
             line = lines[i].strip()
             if not line.startswith('|'):
                 # 表格结束，保存剩余内容
@@ -118,19 +100,11 @@ def read_existing_table(table_path: Path) -> Tuple[List[str], Dict[str, Dict[str
                 break
             
             cells = [cell.strip() for cell in line.strip('|').split('|')]
-            if len(cells) >= 1 and cells[0] and cells[0] != '--':
-                identifier = cells[0]
-                
-                # 确保有足够的列
-                while len(cells) < len(headers):
-                    cells.append('')
-                
-                existing_data[identifier] = {}
-                for j, header in enumerate(headers):
-                    if j < len(cells):
-                        existing_data[identifier][header] = cells[j]
-                    else:
-                        existing_data[identifier][header] = ''
+            if cells[0] and cells[0] != '--':
+                # 确保有足够的列，多余的列由 zip 忽略
+                if len(cells) < header_count:
+                    cells.extend(padding[len(cells):])
+                existing_data[cells[0]] = dict(zip(headers, cells))
         
         print(f"成功读取 {len(existing_data)} 条现有记录")
         
@@ -139,23 +113,18 @@ def read_existing_table(table_path: Path) -> Tuple[List[str], Dict[str, Dict[str
         # 返回默认表头
         headers = ['标识符', '中文名', '玩家社区称呼', '英文名', '翻译键', '存在版本', '隶属于', '截图', '注释']
     
-    return headers, existing_data, non_table_content
-
-def is_empty_or_whitespace(value: str) -> bool:
-    """
-    检查字符串是否为空或只有空格
-    """
-    return not value or value.strip() == ''
+    return headers, existing_data, non_table_content, content_digest
 
 def merge_table_data(
     identifiers: List[str],
     chinese_translations: Dict[str, str],
     english_translations: Dict[str, str],
     existing_data: Dict[str, Dict[str, str]]
-) -> Dict[str, Dict[str, str]]:
+) -> Tuple[Dict[str, Dict[str, str]], List[str]]:
     """
     合并表格数据：已有数据保持不变，只添加新数据
     对于已有数据，如果中英文名或翻译键为空，则尝试填充
+    返回合并后的数据和排好序的标识符列表
     """
     merged_data = {}
     
@@ -167,96 +136,101 @@ def merge_table_data(
     new_count = 0
     updated_count = 0
     
-    for identifier in sorted(identifiers):
-        translation_key, actual_key = get_translation_key(identifier, english_translations)
+    # 循环外绑定 get 方法，避免每次迭代重复查找属性
+    chinese_get = chinese_translations.get
+    english_get = english_translations.get
+    
+    # 先查找所有标识符的翻译（重复的标识符只处理一次）
+    # 合并结果与处理顺序无关，无需排序
+    resolved = {}
+    for identifier in dict.fromkeys(identifiers):
+        # 查找翻译键：优先使用 name_标识符，如果没有找到则使用 title_标识符_01
+        lowered = identifier.lower()
+        name_key = 'name_' + lowered
+        title_key = 'title_' + lowered + '_01'
+        if name_key in english_translations:
+            actual_key = name_key
+        elif title_key in english_translations:
+            actual_key = title_key
+        else:
+            actual_key = ''
         
         # 获取中文名和英文名
-        chinese_name = chinese_translations.get(actual_key, '') if actual_key else ''
-        english_name = english_translations.get(actual_key, '') if actual_key else ''
+        chinese_name = chinese_get(actual_key, '') if actual_key else ''
+        english_name = english_get(actual_key, '') if actual_key else ''
         
         # 如果两个翻译都没有找到，翻译键也置空
         if not chinese_name and not english_name:
-            translation_key = ''
             actual_key = ''
         
-        if identifier in merged_data:
-            # 已有数据，检查是否需要更新空字段
-            existing_entry = merged_data[identifier]
-            updated = False
-            
-            # 检查中英文名和翻译键是否为空
-            if is_empty_or_whitespace(existing_entry.get('中文名', '')) and chinese_name:
-                existing_entry['中文名'] = chinese_name
-                updated = True
-            
-            if is_empty_or_whitespace(existing_entry.get('英文名', '')) and english_name:
-                existing_entry['英文名'] = english_name
-                updated = True
-            
-            if is_empty_or_whitespace(existing_entry.get('翻译键', '')) and actual_key:
-                existing_entry['翻译键'] = actual_key
-                updated = True
-            
-            if updated:
-                updated_count += 1
-                print(f"更新了已有标识符 '{identifier}' 的空字段")
-        else:
-            # 创建新条目
-            merged_data[identifier] = {
-                '标识符': identifier,
-                '中文名': chinese_name,
-                '玩家社区称呼': '',
-                '英文名': english_name,
-                '翻译键': actual_key if actual_key else '',
-                '存在版本': '',
-                '隶属于': '',
-                '截图': '',
-                '注释': ''
-            }
-            new_count += 1
-            
-            # 调试信息
-            if not chinese_name and not english_name:
-                print(f"调试: 新标识符 {identifier} 未找到翻译，尝试了 name_{identifier.lower()} 和 title_{identifier.lower()}_01")
+        resolved[identifier] = (chinese_name, english_name, actual_key, name_key, title_key)
+    
+    # 按是否已有数据分组
+    existing_ids = set(existing_data)
+    update_ids = [identifier for identifier in resolved if identifier in existing_ids]
+    new_ids = [identifier for identifier in resolved if identifier not in existing_ids]
+    
+    # 已有数据，检查是否需要更新空字段
+    for identifier in update_ids:
+        chinese_name, english_name, actual_key, _, _ = resolved[identifier]
+        existing_entry = merged_data[identifier]
+        existing_get = existing_entry.get
+        updated = False
+        
+        # 检查中英文名和翻译键是否为空（读取表格时单元格已去除首尾空格）
+        if not existing_get('中文名') and chinese_name:
+            existing_entry['中文名'] = chinese_name
+            updated = True
+        
+        if not existing_get('英文名') and english_name:
+            existing_entry['英文名'] = english_name
+            updated = True
+        
+        if not existing_get('翻译键') and actual_key:
+            existing_entry['翻译键'] = actual_key
+            updated = True
+        
+        if updated:
+            updated_count += 1
+            print(f"更新了已有标识符 '{identifier}' 的空字段")
+    
+    # 创建新条目
+    for identifier in new_ids:
+        chinese_name, english_name, actual_key, name_key, title_key = resolved[identifier]
+        merged_data[identifier] = {
+            '标识符': identifier,
+            '中文名': chinese_name,
+            '玩家社区称呼': '',
+            '英文名': english_name,
+            '翻译键': actual_key,
+            '存在版本': '',
+            '隶属于': '',
+            '截图': '',
+            '注释': ''
+        }
+        new_count += 1
+        
+        # 调试信息
+        if not chinese_name and not english_name:
+            print(f"调试: 新标识符 {identifier} 未找到翻译，尝试了 {name_key} 和 {title_key}")
     
     print(f"新增了 {new_count} 条记录，更新了 {updated_count} 条已有记录的空字段，保留了 {len(existing_data)} 条原有记录")
-    return merged_data
+    return merged_data, sorted(merged_data)
 
-def write_table(table_path: Path, headers: List[str], data: Dict[str, Dict[str, str]], non_table_content: List[str]):
+def write_table(
+    table_path: Path,
+    headers: List[str],
+    data: Dict[str, Dict[str, str]],
+    non_table_content: List[str],
+    sorted_keys: List[str],
+    existing_digest: Optional[bytes] = None
+):
     """
     写入更新后的Markdown表格
+    数据行按 sorted_keys 的顺序写入
+    如果生成的内容与原文件哈希值（existing_digest）相同，则跳过写入
     """
     try:
-        # 构建表格内容
-        table_lines = []
-        
-        # 构建表头行
-        header_row = '|'
-        for header in headers:
-            # 确保单元格内容不为空
-            cell_content = header.strip() if header.strip() else ' '
-            header_row += f' {cell_content} |'
-        
-        table_lines.append(header_row)
-        
-        # 构建分隔行
-        separator_row = '|'
-        for header in headers:
-            separator_row += ' --- |'
-        
-        table_lines.append(separator_row)
-        
-        # 数据行（按标识符排序）
-        for identifier in sorted(data.keys()):
-            row_data = data[identifier]
-            data_row = '|'
-            for header in headers:
-                value = row_data.get(header, '')
-                # 确保单元格内容不为空
-                cell_content = str(value).strip() if str(value).strip() else ' '
-                data_row += f' {cell_content} |'
-            table_lines.append(data_row)
-        
         # 处理非表格内容
         if non_table_content:
             # 清理非表格内容，移除末尾的连续空行
@@ -281,16 +255,38 @@ def write_table(table_path: Path, headers: List[str], data: Dict[str, Dict[str,
                 # 没有换行符，添加两个
                 non_table_text += '\n\n'
         
-        # 构建最终内容
-        if non_table_text:
-            new_content = non_table_text + '\n'.join(table_lines)
-        else:
-            # 如果没有非表格内容，在表格前添加一个空行
-            new_content = '\n' + '\n'.join(table_lines)
+        # 逐段构建内容，先计算哈希值再一次性写入
+        # 如果没有非表格内容，在表格前添加一个空行
+        chunks = [non_table_text if non_table_text else '\n']
+        
+        # 表头行，确保单元格内容不为空
+        clean_headers = [header.strip() or ' ' for header in headers]
+        chunks.append('| ' + ' | '.join(clean_headers) + ' |')
+        
+        # 分隔行
+        chunks.append('\n|' + ' --- |' * len(headers))
+        
+        # 数据行（按标识符排序），每行以换行符开头，文件末尾不留换行
+        chunks.extend(
+            '\n| ' + ' | '.join(
+                str(row_data.get(header, '')).strip() or ' '
+                for header in headers
+            ) + ' |'
+            for row_data in (data[identifier] for identifier in sorted_keys)
+        )
+        
+        # 内容没有变化时不重写文件
+        if existing_digest is not None:
+            digest = hashlib.blake2b()
+            for chunk in chunks:
+                digest.update(chunk.encode('utf-8'))
+            if digest.digest() == existing_digest:
+                print(f"表格内容没有变化，跳过写入: {table_path}")
+                return
         
-        # 写入文件
-        with open(table_path, 'w', encoding='utf-8', newline='\n') as f:
-            f.write(new_content)
+        # 使用 1 MiB 缓冲区，让整个表格以少量大块写入磁盘
+        with open(table_path, 'w', encoding='utf-8', newline='\n', buffering=1 << 20) as f:
+            f.writelines(chunks)
         
         print(f"表格已成功更新到: {table_path}")
         print(f"共 {len(data)} 条记录")
@@ -347,9 +343,12 @@ def main():
     print(f"找到 {len(identifiers)} 个地图标识符")
     print(f"前10个标识符: {', '.join(identifiers[:10])}{'...' if len(identifiers) > 10 else ''}")
     
-    # 2. 读取翻译文件
-    chinese_translations = parse_strings_file(chinese_path)
-    english_translations = parse_strings_file(english_path)
+    # 2. 读取翻译文件（两个文件互不相关，并行读取）
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        chinese_future = executor.submit(parse_strings_file, chinese_path)
+        english_future = executor.submit(parse_strings_file, english_path)
+        chinese_translations = chinese_future.result()
+        english_translations = english_future.result()
     
     print(f"中文翻译: {len(chinese_translations)} 条")
     print(f"英文翻译: {len(english_translations)} 条")
@@ -363,16 +362,16 @@ def main():
         print(f"  {key}: 中文='{cn}', 英文='{en}'")
     
     # 3. 读取现有表格
-    headers, existing_data, non_table_content = read_existing_table(table_path)
+    headers, existing_data, non_table_content, table_digest = read_existing_table(table_path)
     print(f"\n表格列头: {headers}")
     print(f"现有表格中有 {len(existing_data)} 条记录")
     
     # 4. 合并数据（不覆盖已有数据，但填充空字段）
     print("正在合并表格数据...")
-    merged_data = merge_table_data(identifiers, chinese_translations, english_translations, existing_data)
+    merged_data, sorted_keys = merge_table_data(identifiers, chinese_translations, english_translations, existing_data)
     
     # 5. 写入新表格
-    write_table(table_path, headers, merged_data, non_table_content)
+    write_table(table_path, headers, merged_data, non_table_content, sorted_keys, table_digest)
     
     print("完成！")
 